@@ -1,3 +1,4 @@
+import asyncio
 import json
 
 from airflow import DAG
@@ -5,7 +6,7 @@ from airflow.operators.python import PythonOperator
 from datetime import datetime, timedelta
 from scrappers import BOTScraper as bot
 from scrappers import CTBCScraper as ctbc
-from pymongo import MongoClient, UpdateOne, InsertOne
+from pymongo import MongoClient, UpdateOne
 import os
 import logging
 from datetime import datetime
@@ -15,6 +16,12 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+RATE_KEY_INDEX = [('institution', 1), ('currency_en', 1), ('timestamp', 1)]
+
+# Reused across task runs in the same worker process
+_MONGO_CLIENT = None
+_INDEX_READY = False
+
 
 def hello_world():
     logger.info("Hello World")
@@ -25,134 +32,104 @@ def goodbye_world():
 
 
 def get_mongo_client():
-    """Get MongoDB client with authentication"""
-    return MongoClient(
-        host=os.getenv('MONGO_HOST', 'mongodb'),
-        port=int(os.getenv('MONGO_PORT', 27017)),
-        username=os.getenv('MONGO_USER', 'fx_user'),
-        password=os.getenv('MONGO_PASSWORD', 'fx_password'),
-        authSource=os.getenv('MONGO_DB', 'fx_rates')
-    )
-
-
-def scrape_bot_rates(**context):
-    """Scrape FX rates and save to MongoDB"""
-    try:
-        # Initialize scraper and get rates
-        scraper = bot()
-        rates = scraper.scrape()
-
-        if not rates:
-            raise ValueError("No rates were scraped")
-
-        # Transform rates for MongoDB
-        transformed_rates = []
-        for rate in rates:
-            transformed_rate = {
-                'currency_en': rate['currency']['en'],
-                'currency_zh': rate['currency']['zh'],
-                'cash_buy': rate['rates']['cash']['buy'],
-                'cash_sell': rate['rates']['cash']['sell'],
-                'spot_buy': rate['rates']['spot']['buy'],
-                'spot_sell': rate['rates']['spot']['sell'],
-                'rates': rate['rates'],
-                'institution': 'Bank of Taiwan',
-                'timestamp': datetime.fromisoformat(rate['timestamp'])
-            }
-            transformed_rates.append(transformed_rate)
-
-        for rate in transformed_rates:
-            # Create a copy for logging that handles datetime serialization
-            log_rate = rate.copy()
-            log_rate['timestamp'] = log_rate['timestamp'].isoformat()
-            logger.info(json.dumps(log_rate, indent=4, ensure_ascii=False))
-
-        # Push to XCom for the consolidation task
-        context['task_instance'].xcom_push(key='bot_rates', value=transformed_rates)
-        return f"Scraped {len(transformed_rates)} rates from BOT"
-
-    except Exception as e:
-        logger.error(f"Error in scrape_and_save_rates: {str(e)}")
-        raise
-
-
-def scrape_ctbc_rates(**context):
-    """Scrape CTBC rates"""
+    """Get the process-wide MongoDB client, connecting with authentication on first use"""
+    global _MONGO_CLIENT
+    if _MONGO_CLIENT is None:
+        _MONGO_CLIENT = MongoClient(
+            host=os.getenv('MONGO_HOST', 'mongodb'),
+            port=int(os.getenv('MONGO_PORT', 27017)),
+            username=os.getenv('MONGO_USER', 'fx_user'),
+            password=os.getenv('MONGO_PASSWORD', 'fx_password'),
+            authSource=os.getenv('MONGO_DB', 'fx_rates'),
+            maxPoolSize=10,
+            compressors='zstd,snappy,zlib',
+            zlibCompressionLevel=3
+        )
+    return _MONGO_CLIENT
+
+
+def get_rates_collection():
+    """Get the exchange rates collection, ensuring its unique index once per process"""
+    global _INDEX_READY
+    collection = get_mongo_client()[os.getenv('MONGO_DB', 'fx_rates')]['exchange_rates']
+    if not _INDEX_READY:
+        # Unique key so re-saving an unchanged rate is a no-op
+        collection.create_index(RATE_KEY_INDEX, unique=True)
+        _INDEX_READY = True
+    return collection
+
+
+def log_rates(rates):
+    """Log a batch summary, dumping every rate only when DEBUG is enabled"""
+    institutions = sorted({rate['institution'] for rate in rates})
+    logger.info(f"Batch: {len(rates)} rates, institutions={institutions}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps(rates, indent=4, ensure_ascii=False, default=str))
+
+
+async def gather_rates():
+    """Scrape all institutions concurrently over a shared HTTP client"""
+    async with bot.create_client() as client:
+        scrapers = [bot(client), ctbc(client)]
+        # Keep going when one institution fails so the others still get saved
+        results = await asyncio.gather(
+            *(scraper.scrape_async() for scraper in scrapers),
+            return_exceptions=True
+        )
+        return [(scraper.institution_name, result) for scraper, result in zip(scrapers, results)]
+
+
+def scrape_all_rates():
+    """Scrape FX rates from all institutions, skipping any that fail"""
+    all_rates = []
+    for institution, result in asyncio.run(gather_rates()):
+        if isinstance(result, BaseException):
+            logger.error(f"Error scraping {institution} rates: {str(result)}")
+        elif not result:
+            logger.error(f"No rates were scraped from {institution}")
+        else:
+            all_rates.extend(result)
+
+    if not all_rates:
+        raise ValueError("No rates were scraped from any institution")
+
+    return all_rates
+
+
+def save_to_mongodb(all_rates):
+    """Save consolidated rates from all sources to MongoDB"""
     try:
-        scraper = ctbc()
-        rates = scraper.scrape()
-
-        if not rates:
-            raise ValueError("No rates were scraped from CTBC")
-
-        # Transform rates
-        transformed_rates = []
-        for rate in rates:
-            transformed_rate = {
-                'currency_en': rate['currency']['en'],
-                'currency_zh': rate['currency']['zh'],
-                'cash_buy': rate['rates']['cash']['buy'],
-                'cash_sell': rate['rates']['cash']['sell'],
-                'spot_buy': rate['rates']['spot']['buy'],
-                'spot_sell': rate['rates']['spot']['sell'],
-                'rates': rate['rates'],
-                'institution': 'CTBC Bank',
-                'timestamp': datetime.fromisoformat(rate['timestamp'])
-            }
-            transformed_rates.append(transformed_rate)
-
-        # Push to XCom for the consolidation task
-        context['task_instance'].xcom_push(key='ctbc_rates', value=transformed_rates)
-        return f"Scraped {len(transformed_rates)} rates from CTBC"
+        collection = get_rates_collection()
+
+        # Upsert all rates; rate documents are independent so order does not matter
+        operations = [
+            UpdateOne(
+                {field: rate[field] for field, _ in RATE_KEY_INDEX},
+                {'$setOnInsert': rate},
+                upsert=True
+            )
+            for rate in all_rates
+        ]
+        result = collection.bulk_write(operations, ordered=False, bypass_document_validation=True)
+        logger.info(f"MongoDB operations completed: {result.upserted_count} inserted, "
+                    f"{result.matched_count} already stored")
+
+        return result.upserted_count
 
     except Exception as e:
-        logger.error(f"Error scraping CTBC rates: {str(e)}")
+        logger.error(f"Error saving rates to MongoDB: {str(e)}")
         raise
 
 
-def save_to_mongodb(**context):
-    """Consolidate rates from all sources and save to MongoDB"""
-    try:
-        ti = context['task_instance']
-
-        # Get rates from XCom
-        bot_rates = ti.xcom_pull(task_ids='scrape_bot_rates', key='bot_rates') or []
-        ctbc_rates = ti.xcom_pull(task_ids='scrape_ctbc_rates', key='ctbc_rates') or []
+def scrape_and_save(**context):
+    """Scrape FX rates from all institutions and save them to MongoDB"""
+    all_rates = scrape_all_rates()
 
-        # Combine all rates
-        all_rates = bot_rates + ctbc_rates
+    # Log the rates for debugging
+    log_rates(all_rates)
 
-        if not all_rates:
-            raise ValueError("No rates available to save")
-
-        # Log the rates for debugging
-        logger.info(f"Total rates to save: {len(all_rates)}")
-        for rate in all_rates:
-            rate_copy = rate.copy()
-            rate_copy['timestamp'] = rate_copy['timestamp'].isoformat()
-            logger.info(json.dumps(rate_copy, indent=4, ensure_ascii=False))
-
-        # Save to MongoDB
-        with get_mongo_client() as client:
-            db = client[os.getenv('MONGO_DB', 'fx_rates')]
-            collection = db['exchange_rates']
-
-            # Create insert operations
-            operations = [InsertOne(rate) for rate in all_rates]
-
-            # Execute bulk insert
-            result = collection.bulk_write(operations)
-            logger.info(f"MongoDB operations completed: {result.bulk_api_result}")
-
-            # Log the total count
-            total_records = collection.count_documents({})
-            logger.info(f"Total records in collection: {total_records}")
-
-            return f"Inserted {len(all_rates)} new rates"
-
-    except Exception as e:
-        logger.error(f"Error saving rates to MongoDB: {str(e)}")
-        raise
+    inserted = save_to_mongodb(all_rates)
+    return f"Inserted {inserted} new rates"
 
 
 default_args = {
@@ -178,21 +155,10 @@ with DAG(
         python_callable=hello_world
     )
 
-    # Scraping tasks
-    scrape_bot = PythonOperator(
-        task_id='scrape_bot_rates',
-        python_callable=scrape_bot_rates
-    )
-
-    #scrape_ctbc = PythonOperator(
-    #    task_id='scrape_ctbc_rates',
-    #    python_callable=scrape_ctbc_rates
-    #)
-
-    # MongoDB save task
-    save_rates = PythonOperator(
-        task_id='save_to_mongodb',
-        python_callable=save_to_mongodb
+    # Scrape and save task
+    scrape_and_save_task = PythonOperator(
+        task_id='scrape_and_save',
+        python_callable=scrape_and_save
     )
 
     goodbye_world_task = PythonOperator(
@@ -200,5 +166,4 @@ with DAG(
         python_callable=goodbye_world
     )
 
-    #hello_world_task >> [scrape_bot, scrape_ctbc] >> save_rates >> goodbye_world_task
-    hello_world_task >> scrape_bot >> save_rates >> goodbye_world_task
\ No newline at end of file
+    hello_world_task >> scrape_and_save_task >> goodbye_world_task
\ No newline at end of file
@@ -1,19 +1,51 @@
 from abc import ABC, abstractmethod
+import asyncio
+import json
 import logging
+import math
+import os
+import tempfile
 from datetime import datetime
-from typing import Dict, List, Optional, Union
-from .exceptions import ScraperException, FetchError, ParseError, ValidationError
+from typing import Dict, List, Optional, Tuple, Union
+import httpx
+from .exceptions import ScraperException, FetchError, ParseError, ValidationError, NotModified
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+REQUIRED_FIELDS = (
+    'currency_en', 'currency_zh',
+    'cash_buy', 'cash_sell', 'spot_buy', 'spot_sell',
+    'rates', 'institution', 'timestamp'
+)
+
+_NULL_RATES = frozenset({'-', 'N/A', '', '----', '---'})
+_COMMA_DROP = str.maketrans('', '', ',')
+
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+RETRY_AFTER_MAX = 30
+
+CACHE_PATH = os.getenv('FX_RATE_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'fx_rate_cache.json'))
+
+
+def _is_finite(value) -> bool:
+    """Return True if value is a finite number"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
 
 class BaseScraper(ABC):
     """Base class for FX rate scrapers"""
 
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': USER_AGENT
         }
+        self._cache = self._load_institution_cache()
+        self._validators = {}
 
     @property
     @abstractmethod
@@ -28,37 +60,33 @@ class BaseScraper(ABC):
         pass
 
     @abstractmethod
-    def fetch_data(self) -> Optional[str]:
+    async def fetch_data(self) -> Optional[bytes]:
         """Fetch raw data from the source"""
         pass
 
     @abstractmethod
-    def parse_rates(self, html: str) -> List[Dict]:
-        """Parse the fetched data into structured format"""
+    def parse_rates(self, html: bytes) -> List[Dict]:
+        """Parse the fetched data into flat rate documents"""
         pass
 
     def validate_rate(self, rate: Dict) -> bool:
-        """Validate a single rate entry"""
-        required_fields = ['currency', 'rates', 'timestamp']
+        """Validate a single rate document"""
         try:
             # Check required fields
-            if not all(field in rate for field in required_fields):
+            if not all(field in rate for field in REQUIRED_FIELDS):
                 return False
 
-            # Check currency structure
-            if not isinstance(rate['currency'], dict) or \
-                    not all(k in rate['currency'] for k in ['en', 'zh']):
+            # Check currency names
+            if not rate['currency_en'] or not rate['currency_zh']:
                 return False
 
-            # Check rates structure
-            if not isinstance(rate['rates'], dict) or \
-                    not all(k in rate['rates'] for k in ['cash', 'spot']):
+            # Check timestamp type
+            if not isinstance(rate['timestamp'], datetime):
                 return False
 
-            # Check rate values
-            for rate_type in ['cash', 'spot']:
-                if not all(k in rate['rates'][rate_type] for k in ['buy', 'sell']):
-                    return False
+            # Require at least one usable buy rate
+            if not (_is_finite(rate['cash_buy']) or _is_finite(rate['spot_buy'])):
+                return False
 
             return True
         except Exception as e:
@@ -70,19 +98,148 @@ class BaseScraper(ABC):
         try:
             # Remove any whitespace and replace any dash or N/A with None
             cleaned = rate_str.strip()
-            if cleaned in ['-', 'N/A', '', '----']:
+            if cleaned in _NULL_RATES:
                 return None
-            # Replace any commas and convert to float
-            return float(cleaned.replace(',', ''))
+            # Drop any commas and convert to float
+            return float(cleaned.translate(_COMMA_DROP))
         except (ValueError, AttributeError) as e:
             logger.debug(f"Rate parsing error: {e}")
             return None
 
+    def _parse_rate_cells(self, cells: List) -> Tuple[Optional[float], ...]:
+        """Convert a row's cash buy/sell and spot buy/sell cells to floats"""
+        parse = self._parse_rate
+        return (
+            parse(cells[1].text(strip=True)),
+            parse(cells[2].text(strip=True)),
+            parse(cells[3].text(strip=True)),
+            parse(cells[4].text(strip=True))
+        )
+
+    @staticmethod
+    def _load_cache() -> Dict:
+        """Load cached validators and rates for all institutions"""
+        try:
+            with open(CACHE_PATH, encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict):
+            logger.warning(f"Ignoring malformed rate cache at {CACHE_PATH}")
+            return {}
+        return cache
+
+    def _load_institution_cache(self) -> Dict:
+        """Load this institution's cache entry, treating anything malformed as empty"""
+        entry = self._load_cache().get(self.institution_name)
+        if not entry:
+            return {}
+        try:
+            if not isinstance(entry, dict) or not isinstance(entry.get('rates', []), list):
+                raise TypeError("entry is not a dict with a list of rates")
+            rates = []
+            for rate in entry.get('rates', []):
+                rate = dict(rate)
+                rate['timestamp'] = datetime.fromisoformat(rate['timestamp'])
+                rates.append(rate)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring malformed rate cache entry for {self.institution_name}: {e}")
+            return {}
+        return {**entry, 'rates': rates}
+
+    def _save_cache(self, rates: List[Dict]):
+        """Persist the response validators and rates for this institution"""
+        cache = self._load_cache()
+        if any(self._validators.values()):
+            cache[self.institution_name] = {**self._validators, 'rates': rates}
+        elif cache.pop(self.institution_name, None) is None:
+            # No validators to store and no stale entry to drop
+            return
+
+        # Write to a temp file and swap it in so a crash cannot truncate the cache
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(CACHE_PATH) or '.',
+                                             suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                json.dump(cache, f, ensure_ascii=False, default=datetime.isoformat)
+            os.replace(tmp_path, CACHE_PATH)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Failed to write rate cache for {self.institution_name}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _conditional_headers(self) -> Dict[str, str]:
+        """Return If-None-Match/If-Modified-Since headers from the cache"""
+        headers = {}
+        if not self._cache.get('rates'):
+            return headers
+        if self._cache.get('etag'):
+            headers['If-None-Match'] = self._cache['etag']
+        if self._cache.get('last_modified'):
+            headers['If-Modified-Since'] = self._cache['last_modified']
+        return headers
+
+    def _check_not_modified(self, response: httpx.Response):
+        """Raise NotModified on a 304, otherwise remember the response validators"""
+        if response.status_code == 304:
+            raise NotModified(f"{self.institution_name} rates have not changed")
+        self._validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+
+    @staticmethod
+    def create_client() -> httpx.AsyncClient:
+        """Create a pooled HTTP client that can be shared between scrapers"""
+        limits = httpx.Limits(max_connections=4, max_keepalive_connections=4)
+        return httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            timeout=10,
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=3)
+        )
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """Return a numeric Retry-After delay in seconds, capped at RETRY_AFTER_MAX"""
+        try:
+            delay = float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            return None
+        if math.isnan(delay):
+            return None
+        return min(max(delay, 0), RETRY_AFTER_MAX)
+
+    async def _get(self, url: str, headers: Dict[str, str]) -> httpx.Response:
+        """GET a URL, retrying transient error statuses with exponential backoff or Retry-After"""
+        for attempt in range(RETRY_TOTAL + 1):
+            response = await self.client.get(url, headers=headers)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == RETRY_TOTAL:
+                return response
+            delay = self._retry_after(response)
+            if delay is None:
+                delay = RETRY_BACKOFF_FACTOR * (2 ** attempt)
+            logger.warning(f"{self.institution_name} returned {response.status_code}, retrying in {delay}s")
+            await asyncio.sleep(delay)
+
     def scrape(self) -> List[Dict]:
+        """Scrape exchange rates from a synchronous caller"""
+        return asyncio.run(self.scrape_async())
+
+    async def scrape_async(self) -> List[Dict]:
         """Main method to scrape exchange rates"""
+        if self.client is None:
+            async with self.create_client() as client:
+                self.client = client
+                try:
+                    return await self.scrape_async()
+                finally:
+                    self.client = None
+
         try:
             # Fetch data
-            html = self.fetch_data()
+            html = await self.fetch_data()
             if not html:
                 raise FetchError(f"Failed to fetch data from {self.institution_name}")
 
@@ -92,19 +249,28 @@ class BaseScraper(ABC):
                 raise ParseError(f"Failed to parse rates from {self.institution_name}")
 
             # Validate rates
-            valid_rates = []
-            for rate in rates:
-                if self.validate_rate(rate):
-                    valid_rates.append(rate)
-                else:
-                    logger.warning(f"Invalid rate data from {self.institution_name}: {rate}")
+            validate = self.validate_rate
+            valid_rates = [rate for rate in rates if validate(rate)]
+            if len(valid_rates) < len(rates):
+                logger.warning(f"Dropped {len(rates) - len(valid_rates)} invalid rates from {self.institution_name}")
 
             if not valid_rates:
                 raise ValidationError(f"No valid rates found from {self.institution_name}")
 
             logger.info(f"Successfully scraped {len(valid_rates)} rates from {self.institution_name}")
+            self._save_cache(valid_rates)
             return valid_rates
 
+        except NotModified:
+            validate = self.validate_rate
+            cached_rates = [rate for rate in self._cache['rates'] if validate(rate)]
+            if cached_rates:
+                logger.info(f"{self.institution_name} rates not modified, using cached rates")
+                return cached_rates
+            # Without usable cached rates, fall back to an unconditional fetch
+            logger.warning(f"No valid cached rates for {self.institution_name}, refetching")
+            self._cache = {}
+            return await self.scrape_async()
         except ScraperException as e:
             logger.error(f"Scraping error for {self.institution_name}: {str(e)}")
             raise
@@ -1,7 +1,8 @@
 from typing import Optional, List, Dict
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+import re
+import httpx
+from selectolax.lexbor import LexborHTMLParser
+from datetime import datetime, timezone
 import logging
 
 from .base import BaseScraper
@@ -9,6 +10,8 @@ from .exceptions import FetchError, ParseError
 
 logger = logging.getLogger(__name__)
 
+_CURRENCY_RE = re.compile(r'([^(]+)\(([^)]+)\)')
+
 
 class BOTScraper(BaseScraper):
     """Bank of Taiwan Exchange Rate Scraper"""
@@ -21,67 +24,71 @@ class BOTScraper(BaseScraper):
     def base_url(self) -> str:
         return "https://rate.bot.com.tw/xrt?Lang=zh-TW"
 
-    def fetch_data(self) -> Optional[str]:
+    async def fetch_data(self) -> Optional[bytes]:
         """Fetch the webpage content"""
         try:
-            response = requests.get(self.base_url, headers=self.headers)
+            response = await self._get(
+                self.base_url,
+                headers={**self.headers, **self._conditional_headers()}
+            )
+            self._check_not_modified(response)
             response.raise_for_status()
-            response.encoding = 'utf-8'
-            return response.text
+            # Hand the raw UTF-8 bytes to the parser without decoding to str first
+            return response.content
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to fetch data from {self.institution_name}: {e}")
             raise FetchError(f"HTTP request failed: {str(e)}")
 
-    def parse_rates(self, html: str) -> List[Dict]:
+    def parse_rates(self, html: bytes) -> List[Dict]:
         """Parse the HTML and extract exchange rates"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            tree = LexborHTMLParser(html)
             rates = []
 
             # Find all rows in the rate table
-            rows = soup.select('.table tbody tr')
+            rows = tree.css('.table tbody tr')
             if not rows:
                 raise ParseError("Could not find exchange rate table")
 
+            # All rows of one scrape share a single timestamp
+            scrape_ts = datetime.now(tz=timezone.utc)
             for row in rows:
                 try:
                     # Extract currency info
-                    currency_cell = row.select_one('.currency .print_show')
+                    currency_cell = row.css_first('.currency .print_show')
                     if not currency_cell:
                         continue
 
-                    currency_zh = currency_cell.contents[0].split('(')[0].strip()
-                    currency_en = currency_cell.contents[-1].split('(')[1].replace(')', '')
+                    match = _CURRENCY_RE.search(currency_cell.text())
+                    if not match:
+                        continue
+
+                    currency_zh = match.group(1).strip()
+                    currency_en = match.group(2).strip()
 
                     # Extract rates
-                    cells = row.select('td')
+                    cells = row.css('td')
                     if len(cells) < 5:  # We need at least 5 cells for all rates
                         continue
 
+                    cash_buy, cash_sell, spot_buy, spot_sell = self._parse_rate_cells(cells)
                     rate = {
-                        'currency': {
-                            'zh': currency_zh,
-                            'en': currency_en
-                        },
+                        'currency_en': currency_en,
+                        'currency_zh': currency_zh,
+                        'cash_buy': cash_buy,
+                        'cash_sell': cash_sell,
+                        'spot_buy': spot_buy,
+                        'spot_sell': spot_sell,
                         'rates': {
-                            'cash': {
-                                'buy': self._parse_rate(cells[1].text),
-                                'sell': self._parse_rate(cells[2].text)
-                            },
-                            'spot': {
-                                'buy': self._parse_rate(cells[3].text),
-                                'sell': self._parse_rate(cells[4].text)
-                            }
+                            'cash': {'buy': cash_buy, 'sell': cash_sell},
+                            'spot': {'buy': spot_buy, 'sell': spot_sell}
                         },
-                        'timestamp': datetime.now().isoformat()
+                        'institution': self.institution_name,
+                        'timestamp': scrape_ts
                     }
 
-                    # Validate before adding
-                    if self.validate_rate(rate):
-                        rates.append(rate)
-                    else:
-                        logger.warning(f"Invalid rate data: {rate}")
+                    rates.append(rate)
 
                 except Exception as e:
                     logger.warning(f"Error parsing row: {e}")
@@ -12,4 +12,8 @@ class ParseError(ScraperException):
 
 class ValidationError(ScraperException):
     """Raised when data validation fails"""
+    pass
+
+class NotModified(ScraperException):
+    """Raised when the source reports the data has not changed since the last fetch"""
     pass
\ No newline at end of file